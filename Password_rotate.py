@@ -14,6 +14,19 @@ from datetime import datetime
 from pathlib import Path
 import re
 import shlex
+import shutil
+import smtplib
+import ssl
+import ipaddress
+import json
+import time
+import threading
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
 
 # Configuration
 class Config:
@@ -33,6 +46,154 @@ class Config:
     DB_NAME = "smrtcell_db"
     DB_USER = "smart_usr"
 
+    # SMTP dispatch for credential emails (leave SMTP_HOST empty to only save drafts)
+    SMTP_HOST = ""
+    SMTP_PORT = 587
+    SMTP_USE_STARTTLS = True
+    SMTP_USER = ""
+    SMTP_PASSWORD = ""
+    EMAIL_FROM = ""
+    EMAIL_RECIPIENTS = []
+    EMAIL_SUBJECT = f"Updated server credentials - {VIRTUALMIN_DOMAIN}"
+    SMTP_BATCH_SIZE = 20        # messages sent before the connection is re-checked
+    SMTP_RATE_LIMIT = 5         # max messages per second, 0 disables throttling
+    SMTP_MAX_RETRIES = 3        # attempts per message after the first one
+    SMTP_RETRY_BACKOFF = 2      # seconds, doubled after every failed attempt
+    SMTP_TIMEOUT = 30
+
+    # Storefront/admin latency probe during rotation steps
+    PROBE_ENABLED = False
+    STOREFRONT_URL = "https://www.smartcellular.co.uk/"
+    PROBE_URLS = [STOREFRONT_URL, MAGENTO_URL]
+    PROBE_INTERVAL = 1.0        # seconds between samples for each URL
+    PROBE_TIMEOUT = 10
+    PROBE_WINDOW = 15           # seconds sampled before and after each step
+
+class LatencyProbe:
+    """Background sampler of URL latency, tagged with the current rotation step and phase"""
+
+    def __init__(self, urls, interval, timeout):
+        self.urls = urls
+        self.interval = interval
+        self.timeout = timeout
+        self.samples = []
+        self.step = None
+        self.phase = "idle"
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.threads = []
+
+    def start(self):
+        """Start one sampling thread per URL"""
+        for url in self.urls:
+            thread = threading.Thread(target=self.sample_loop, args=(url,), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        """Stop sampling and wait for in-flight requests to finish"""
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(self.timeout + 1)
+        self.threads = []
+
+    def set_phase(self, step, phase):
+        """Tag subsequent samples with a rotation step and phase"""
+        with self.lock:
+            self.step = step
+            self.phase = phase
+
+    def sample_loop(self, url):
+        """Sample a URL at a fixed rate until stopped"""
+        next_sample = time.monotonic()
+        while not self.stop_event.is_set():
+            self.sample(url)
+            # Keep a fixed schedule; skip ticks missed while a slow request was running
+            next_sample += self.interval
+            now = time.monotonic()
+            if next_sample < now:
+                next_sample = now
+            self.stop_event.wait(next_sample - now)
+
+    def sample(self, url):
+        """Request a URL once and record latency and outcome"""
+        with self.lock:
+            step, phase = self.step, self.phase
+
+        error = ""
+        start = time.monotonic()
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                response.read()
+        except urllib.error.HTTPError as e:
+            error = f"HTTP {e.code}"
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+        latency = time.monotonic() - start
+
+        with self.lock:
+            self.samples.append({"step": step, "phase": phase, "url": url, "latency": latency, "error": error})
+
+    @staticmethod
+    def percentile(values, percent):
+        """Nearest-rank percentile of a sorted list"""
+        index = max(0, -(-len(values) * percent // 100) - 1)
+        return values[int(index)]
+
+    def summary(self):
+        """Build before/during/after latency stats for every probed step and URL"""
+        with self.lock:
+            samples = list(self.samples)
+
+        steps = []
+        for sample in samples:
+            if sample["step"] and sample["step"] not in steps:
+                steps.append(sample["step"])
+
+        stats = []
+        for step in steps:
+            for phase in ("before", "during", "after"):
+                for url in self.urls:
+                    selected = [s for s in samples if s["step"] == step and s["phase"] == phase and s["url"] == url]
+                    # Failed requests are counted but kept out of the percentiles
+                    latencies = sorted(s["latency"] * 1000 for s in selected if not s["error"])
+                    entry = {
+                        "step": step,
+                        "phase": phase,
+                        "url": url,
+                        "samples": len(selected),
+                        "errors": len(selected) - len(latencies),
+                        "p50_ms": None,
+                        "p95_ms": None,
+                        "max_ms": None,
+                    }
+                    if latencies:
+                        entry["p50_ms"] = round(self.percentile(latencies, 50), 1)
+                        entry["p95_ms"] = round(self.percentile(latencies, 95), 1)
+                        entry["max_ms"] = round(latencies[-1], 1)
+                    stats.append(entry)
+        return stats
+
+    def summary_lines(self, stats):
+        """Format latency stats as readable report lines"""
+        lines = []
+        current_step = None
+        for entry in stats:
+            if entry["step"] != current_step:
+                current_step = entry["step"]
+                lines.append(f"{current_step}:")
+            prefix = f"  {entry['phase']:<7} {entry['url']}:"
+            if not entry["samples"]:
+                lines.append(f"{prefix} no samples")
+            elif entry["p50_ms"] is None:
+                lines.append(f"{prefix} n={entry['samples']} errors={entry['errors']} (no successful samples)")
+            else:
+                lines.append(
+                    f"{prefix} n={entry['samples']} errors={entry['errors']} "
+                    f"p50={entry['p50_ms']:.0f}ms p95={entry['p95_ms']:.0f}ms max={entry['max_ms']:.0f}ms"
+                )
+        return lines
+
 class PasswordManager:
     def __init__(self):
         self.magento_root = ""
@@ -43,6 +204,10 @@ class PasswordManager:
             "mysql": {"password": "", "updated": False},
             "magento_users": {}
         }
+        self.email_dispatch_status = []
+        self.latency_probe = None
+        self.probe_report_file = ""
+        self.validation_results = {}
         self.setup_logging()
         
     def setup_logging(self):
@@ -274,43 +439,96 @@ class PasswordManager:
         print("n98-magerun2.phar not found. Downloading...")
         return self.download_n98_magerun()
 
-    def validate_configuration(self):
-        """Validate system configuration"""
-        print("=== System Validation ===")
-        
-        # Check Magento root
+    def check_magento_files(self):
+        """Check Magento root, env.php and owner"""
+        if not self.magento_root:
+            return False, "ERROR: No Magento installation selected"
         if not Path(self.magento_root).exists():
-            print("❌ ERROR: Magento root directory not found")
-            return False
-        else:
-            print("✅ Magento root directory exists")
-        
-        # Check env.php
+            return False, "ERROR: Magento root directory not found"
         if not Path(self.magento_env_file).exists():
-            print("❌ ERROR: Magento env.php not found")
-            return False
-        else:
-            print("✅ Magento env.php exists")
-        
-        # Check Magento owner
+            return False, "ERROR: Magento env.php not found"
         magento_owner = self.get_magento_owner()
         if not magento_owner:
-            print("❌ ERROR: Could not determine Magento owner")
-            return False
-        else:
-            print(f"✅ Magento owner: {magento_owner}")
-        
-        # Validate n98-magerun (this will auto-download if missing)
+            return False, "ERROR: Could not determine Magento owner"
+        return True, f"Magento root and env.php exist (owner: {magento_owner})"
+
+    def check_n98_magerun(self):
+        """Check n98-magerun2 is working, downloading it if needed"""
+        if not self.magento_root or not Path(self.magento_root).exists():
+            return False, "ERROR: n98-magerun2 needs a valid Magento root"
         if not self.validate_n98_magerun():
+            return False, "ERROR: n98-magerun2.phar is not available"
+        return True, "n98-magerun2.phar is available"
+
+    def check_virtualmin_cli(self):
+        """Check the virtualmin command is installed"""
+        virtualmin_path = shutil.which("virtualmin")
+        if not virtualmin_path:
+            return False, "ERROR: virtualmin command not found"
+        return True, f"Virtualmin CLI found at {virtualmin_path}"
+
+    def check_mysql_reachable(self):
+        """Check MySQL accepts connections from the mysql client"""
+        success, output = self.run_command("mysql -e 'SELECT 1'", shell=True)
+        if not success:
+            return False, f"ERROR: MySQL is not reachable: {output}"
+        return True, "MySQL is reachable"
+
+    def ensure_requirements(self, *checks):
+        """Run the given validation checks concurrently, caching passed checks for the session"""
+        available_checks = {
+            "magento": self.check_magento_files,
+            "n98": self.check_n98_magerun,
+            "virtualmin": self.check_virtualmin_cli,
+            "mysql": self.check_mysql_reachable,
+        }
+
+        # Only passed checks are cached, failed ones are re-run on the next request
+        pending = [name for name in checks if name not in self.validation_results]
+        if not pending:
+            return True
+
+        # Magento detection may prompt, so it runs before the concurrent checks
+        if "magento" in pending and not self.magento_root:
+            if self.detect_magento_root():
+                print(f"\nUsing Magento: {self.magento_root}\n")
+            else:
+                print("Failed to locate Magento installation")
+
+        results = {}
+        print("=== System Validation ===")
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            futures = {name: executor.submit(available_checks[name]) for name in pending}
+            for name in pending:
+                try:
+                    results[name] = futures[name].result()
+                except Exception as e:
+                    self.logger.exception(f"Validation check '{name}' failed")
+                    results[name] = (False, f"ERROR: {name} check failed: {e}")
+
+        for name in pending:
+            success, message = results[name]
+            print(f"{'✅' if success else '❌'} {message}")
+            if success:
+                self.validation_results[name] = results[name]
+
+        # Let the operator pick a Magento installation again next time
+        if not results.get("magento", (True, ""))[0]:
+            self.magento_root = ""
+            self.magento_env_file = ""
+
+        if not all(success for success, _ in results.values()):
+            print("System validation failed. Please check the errors above.")
             return False
-        
-        print("✅ All system checks passed")
         return True
 
     def update_magento_passwords(self):
         """Update Magento admin passwords"""
         print("=== Update Magento Admin Passwords ===")
         
+        if not self.ensure_requirements("magento", "n98"):
+            return
+        
         # Show users that will be updated
         print("The following users will be updated:")
         for user in Config.MAGENTO_USERS:
@@ -345,27 +563,28 @@ class PasswordManager:
             
         success_count = 0
         
-        for user, password in passwords.items():
-            print(f"Updating password for {user}...")
+        with self.probe_step("Magento admin passwords"):
+            for user, password in passwords.items():
+                print(f"Updating password for {user}...")
             
-            # Use HEREDOC style to avoid all shell escaping issues
-            cmd = f"""su - {magento_owner} << 'EOF'
+                # Use HEREDOC style to avoid all shell escaping issues
+                cmd = f"""su - {magento_owner} << 'EOF'
 cd {shlex.quote(self.magento_root)}
 php {Config.N98_MAGERUN_PATH} admin:user:change-password {shlex.quote(user)} {shlex.quote(password)}
 EOF"""
             
-            success, output = self.run_command(cmd, shell=True)
+                success, output = self.run_command(cmd, shell=True)
             
-            if success and "Password successfully changed" in output:
-                print(f"✅ Successfully updated password for {user}")
-                self.password_changes["magento_users"][user] = password
-                success_count += 1
-            else:
-                print(f"❌ Failed to update password for {user}")
-                if output:
-                    # Show only first line of error to avoid clutter
-                    error_line = output.split('\n')[0] if output else "Unknown error"
-                    print(f"Error: {error_line}")
+                if success and "Password successfully changed" in output:
+                    print(f"✅ Successfully updated password for {user}")
+                    self.password_changes["magento_users"][user] = password
+                    success_count += 1
+                else:
+                    print(f"❌ Failed to update password for {user}")
+                    if output:
+                        # Show only first line of error to avoid clutter
+                        error_line = output.split('\n')[0] if output else "Unknown error"
+                        print(f"Error: {error_line}")
         
         print(f"📊 Summary: {success_count}/{len(Config.MAGENTO_USERS)} users updated successfully")
 
@@ -373,6 +592,9 @@ EOF"""
         """Update Virtualmin password"""
         print("=== Update Virtualmin Password ===")
         
+        if not self.ensure_requirements("virtualmin"):
+            return
+        
         print(f"Domain: {Config.VIRTUALMIN_DOMAIN}")
         print(f"User: {Config.VIRTUALMIN_USER}")
         
@@ -393,7 +615,8 @@ EOF"""
         # Use list format to avoid shell escaping issues
         cmd = ["virtualmin", "modify-domain", "--domain", Config.VIRTUALMIN_DOMAIN, "--pass", new_password]
         
-        success, output = self.run_command(" ".join(shlex.quote(arg) for arg in cmd), shell=False)
+        with self.probe_step("Virtualmin password"):
+            success, output = self.run_command(" ".join(shlex.quote(arg) for arg in cmd), shell=False)
         
         if success:
             print(f"✅ Successfully updated Virtualmin password for {Config.VIRTUALMIN_USER}")
@@ -406,6 +629,9 @@ EOF"""
         """Update MySQL database password"""
         print("=== Update MySQL Database Password ===")
         
+        if not self.ensure_requirements("magento", "mysql"):
+            return
+        
         print(f"MySQL User: {Config.MYSQL_USER}")
         print(f"MySQL Host: {Config.MYSQL_HOST}")
         print(f"Magento Env File: {self.magento_env_file}")
@@ -427,57 +653,78 @@ EOF"""
         # Use single quotes for MySQL command with safe password
         mysql_cmd = f"mysql -e 'ALTER USER \"{Config.MYSQL_USER}\"@\"{Config.MYSQL_HOST}\" IDENTIFIED BY \"{new_password}\"; FLUSH PRIVILEGES;'"
         
-        success, output = self.run_command(mysql_cmd, shell=True)
+        # ALTER USER and the env.php rewrite are probed as one step so the probe
+        # never widens the window where the database and env.php disagree
+        with self.probe_step("MySQL password and env.php"):
+            success, output = self.run_command(mysql_cmd, shell=True)
         
-        if not success:
-            print(f"❌ Failed to update MySQL password for {Config.MYSQL_USER}")
-            if output:
-                print(f"Error: {output}")
-            return
+            if not success:
+                print(f"❌ Failed to update MySQL password for {Config.MYSQL_USER}")
+                if output:
+                    print(f"Error: {output}")
+                return
         
-        print(f"✅ Successfully updated MySQL password for {Config.MYSQL_USER}")
+            print(f"✅ Successfully updated MySQL password for {Config.MYSQL_USER}")
         
-        # Update Magento env.php
-        print("Updating Magento configuration file...")
+            # Update Magento env.php
+            print("Updating Magento configuration file...")
         
-        # Create backup
-        backup_file = f"{self.magento_env_file}.backup.{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        backup_success, backup_output = self.run_command(f"cp {shlex.quote(self.magento_env_file)} {shlex.quote(backup_file)}", shell=True)
+            # Create backup
+            backup_file = f"{self.magento_env_file}.backup.{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            backup_success, backup_output = self.run_command(f"cp {shlex.quote(self.magento_env_file)} {shlex.quote(backup_file)}", shell=True)
         
-        if backup_success:
-            print(f"Created backup: {backup_file}")
-        else:
-            print(f"Warning: Failed to create backup: {backup_output}")
+            if backup_success:
+                print(f"Created backup: {backup_file}")
+            else:
+                print(f"Warning: Failed to create backup: {backup_output}")
         
-        # Update password in env.php using Python for reliability
-        try:
-            with open(self.magento_env_file, 'r') as f:
-                content = f.read()
+            # Update password in env.php using Python for reliability
+            try:
+                with open(self.magento_env_file, 'r') as f:
+                    content = f.read()
             
-            # Use regex to find and replace the password line
-            pattern = r"('password' => ')(.*?)(')"
-            new_content = re.sub(pattern, f"'password' => '{new_password}'", content)
+                # Use regex to find and replace the password line
+                pattern = r"('password' => ')(.*?)(')"
+                new_content = re.sub(pattern, f"'password' => '{new_password}'", content)
             
-            with open(self.magento_env_file, 'w') as f:
-                f.write(new_content)
+                with open(self.magento_env_file, 'w') as f:
+                    f.write(new_content)
             
-            print("✅ Successfully updated Magento configuration file")
-            self.password_changes["mysql"]["password"] = new_password
-            self.password_changes["mysql"]["updated"] = True
-        except Exception as e:
-            print(f"❌ Failed to update Magento configuration file: {e}")
-            print("The MySQL password was updated but the config file was not.")
-            print(f"Please manually update {self.magento_env_file} with the new password.")
+                print("✅ Successfully updated Magento configuration file")
+                self.password_changes["mysql"]["password"] = new_password
+                self.password_changes["mysql"]["updated"] = True
+            except Exception as e:
+                print(f"❌ Failed to update Magento configuration file: {e}")
+                print("The MySQL password was updated but the config file was not.")
+                print(f"Please manually update {self.magento_env_file} with the new password.")
 
     def update_all_passwords(self):
         """Update all passwords"""
         print("=== Update All Passwords ===")
         
+        steps = [
+            ("All Magento admin users", ("magento", "n98"), self.update_magento_passwords),
+            ("Virtualmin user", ("virtualmin",), self.update_virtualmin_password),
+            ("MySQL database user and Magento configuration file", ("magento", "mysql"), self.update_database_password),
+        ]
+        
+        # Run every check up front so they overlap; each update reuses the cached result
+        self.ensure_requirements("magento", "n98", "virtualmin", "mysql")
+        runnable = [step for step in steps if all(name in self.validation_results for name in step[1])]
+        skipped = [step for step in steps if step not in runnable]
+        
+        if not runnable:
+            print("No password updates can run until the validation errors above are fixed")
+            return
+        
         print("This will update:")
-        print("  - All Magento admin users")
-        print("  - Virtualmin user")
-        print("  - MySQL database user")
-        print("  - Magento configuration file")
+        for description, _, _ in runnable:
+            print(f"  - {description}")
+        
+        if skipped:
+            print("Skipped because validation failed:")
+            for description, _, _ in skipped:
+                print(f"  - {description}")
         
         # Ask for confirmation
         if not self.prompt_yes_no("Do you want to update ALL passwords?"):
@@ -490,14 +737,9 @@ EOF"""
             return
         
         # Execute each operation with user confirmation at each step
-        print("\n" + "="*50)
-        self.update_magento_passwords()
-        
-        print("\n" + "="*50)
-        self.update_virtualmin_password()
-        
-        print("\n" + "="*50)
-        self.update_database_password()
+        for _, _, update in runnable:
+            print("\n" + "="*50)
+            update()
         
         print("\n" + "="*50)
         print("All password updates completed")
@@ -622,6 +864,8 @@ System Administrator
             
             print(f"Sections updated: {', '.join(updates)}")
             print(f"Email draft saved to: {email_file}")
+            if self.probe_report_file:
+                print(f"Latency report saved to: {self.probe_report_file}")
             print("\nEmail Content:")
             print("="*70)
             print(email_content)
@@ -631,6 +875,239 @@ System Administrator
         except Exception as e:
             print(f"Error saving email draft: {e}")
 
+    def build_email_messages(self):
+        """Build one email message per configured recipient from the draft"""
+        email_content = self.generate_email_draft()
+        if not email_content:
+            return []
+
+        messages = []
+        for recipient in Config.EMAIL_RECIPIENTS:
+            message = EmailMessage()
+            message["From"] = Config.EMAIL_FROM or Config.SMTP_USER
+            message["To"] = recipient
+            message["Subject"] = Config.EMAIL_SUBJECT
+            message["Date"] = formatdate(localtime=True)
+            message["Message-ID"] = make_msgid()
+            message.set_content(email_content)
+            messages.append(message)
+        return messages
+
+    def is_loopback_smtp_host(self):
+        """Return True if SMTP_HOST points at this machine"""
+        if Config.SMTP_HOST == "localhost":
+            return True
+        try:
+            return ipaddress.ip_address(Config.SMTP_HOST).is_loopback
+        except ValueError:
+            return False
+
+    def open_smtp_connection(self):
+        """Open an SMTP connection, upgrade to TLS and log in if configured"""
+        smtp = smtplib.SMTP(Config.SMTP_HOST, Config.SMTP_PORT, timeout=Config.SMTP_TIMEOUT)
+        try:
+            smtp.ehlo()
+            if Config.SMTP_USE_STARTTLS:
+                # Verify certificate and hostname, the message carries every rotated password
+                smtp.starttls(context=ssl.create_default_context())
+                smtp.ehlo()
+            if Config.SMTP_USER:
+                smtp.login(Config.SMTP_USER, Config.SMTP_PASSWORD)
+        except Exception:
+            smtp.close()
+            raise
+
+        # smtplib sends commands one at a time, so PIPELINING is only reported here
+        if smtp.has_extn("pipelining"):
+            self.logger.info(f"SMTP server {Config.SMTP_HOST} advertises PIPELINING")
+        self.logger.info(f"Connected to SMTP server {Config.SMTP_HOST}:{Config.SMTP_PORT}")
+        return smtp
+
+    def close_smtp_connection(self, smtp):
+        """Close SMTP connection, ignoring errors from an already dead socket"""
+        if smtp is None:
+            return
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+    def is_transient_smtp_error(self, error):
+        """Return True if a failed send is worth retrying"""
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return all(400 <= code < 500 for code, _ in error.recipients.values())
+        if isinstance(error, smtplib.SMTPResponseException):
+            return 400 <= error.smtp_code < 500
+        return self.is_connection_error(error)
+
+    def is_connection_error(self, error):
+        """Return True if the SMTP connection is unusable after this error"""
+        # SMTPException subclasses OSError, so plain socket errors are checked explicitly
+        return isinstance(error, smtplib.SMTPServerDisconnected) or not isinstance(error, smtplib.SMTPException)
+
+    def dispatch_email_drafts(self):
+        """Send email drafts over one reused SMTP connection with batching, throttling and retries"""
+        if not Config.SMTP_HOST or not Config.EMAIL_RECIPIENTS:
+            return
+
+        messages = self.build_email_messages()
+        if not messages:
+            return
+
+        print("=== Send Email Drafts ===")
+        print(f"SMTP Server: {Config.SMTP_HOST}:{Config.SMTP_PORT}")
+        print(f"Recipients: {', '.join(Config.EMAIL_RECIPIENTS)}")
+
+        if not Config.SMTP_USE_STARTTLS and not self.is_loopback_smtp_host():
+            print(f"❌ Refusing to send credentials to {Config.SMTP_HOST} without STARTTLS")
+            print("Enable SMTP_USE_STARTTLS or use a local SMTP server")
+            return
+
+        if not self.prompt_yes_no("Do you want to send the credentials email to these recipients?"):
+            print("Email dispatch cancelled")
+            return
+
+        min_interval = 1.0 / Config.SMTP_RATE_LIMIT if Config.SMTP_RATE_LIMIT > 0 else 0
+        batch_size = max(1, Config.SMTP_BATCH_SIZE)
+        last_send = 0.0
+        smtp = None
+        connection_error = ""
+
+        try:
+            for batch_start in range(0, len(messages), batch_size):
+                batch = messages[batch_start:batch_start + batch_size]
+                self.logger.info(f"Sending email batch {batch_start // batch_size + 1} ({len(batch)} messages)")
+
+                # Reuse the connection across batches while the server still answers
+                if smtp is not None:
+                    try:
+                        smtp.noop()
+                    except (smtplib.SMTPException, OSError):
+                        self.close_smtp_connection(smtp)
+                        smtp = None
+
+                for message in batch:
+                    recipient = message["To"]
+                    status = {"recipient": recipient, "status": "failed", "attempts": 0, "error": ""}
+                    delay = Config.SMTP_RETRY_BACKOFF
+
+                    # Stop retrying once a message has used up its retries just opening the connection
+                    if connection_error:
+                        status["error"] = f"Skipped, SMTP connection unavailable: {connection_error}"
+                        self.email_dispatch_status.append(status)
+                        print(f"❌ Failed to send email to {recipient}: {status['error']}")
+                        continue
+
+                    connecting = False
+
+                    while status["attempts"] <= Config.SMTP_MAX_RETRIES:
+                        wait = min_interval - (time.monotonic() - last_send)
+                        if wait > 0:
+                            time.sleep(wait)
+
+                        status["attempts"] += 1
+                        try:
+                            if smtp is None:
+                                connecting = True
+                                smtp = self.open_smtp_connection()
+                                connecting = False
+                            last_send = time.monotonic()
+                            smtp.send_message(message)
+                            status["status"] = "sent"
+                            status["error"] = ""
+                            break
+                        except (smtplib.SMTPException, OSError) as e:
+                            status["error"] = str(e)
+                            self.logger.error(f"Failed to send email to {recipient} (attempt {status['attempts']}): {e}")
+
+                            if self.is_connection_error(e):
+                                self.close_smtp_connection(smtp)
+                                smtp = None
+
+                            if not self.is_transient_smtp_error(e) or status["attempts"] > Config.SMTP_MAX_RETRIES:
+                                break
+
+                            time.sleep(delay)
+                            delay *= 2
+
+                    if status["status"] != "sent" and connecting:
+                        connection_error = status["error"]
+
+                    self.email_dispatch_status.append(status)
+                    if status["status"] == "sent":
+                        self.logger.info(f"Email sent to {recipient} after {status['attempts']} attempt(s)")
+                        print(f"✅ Email sent to {recipient}")
+                    else:
+                        print(f"❌ Failed to send email to {recipient}: {status['error']}")
+        finally:
+            self.close_smtp_connection(smtp)
+
+        sent_count = sum(1 for status in self.email_dispatch_status if status["status"] == "sent")
+        print(f"📊 Summary: {sent_count}/{len(self.email_dispatch_status)} emails sent successfully")
+
+    def start_latency_probe(self):
+        """Start sampling storefront and admin URLs if the probe is enabled"""
+        if not Config.PROBE_ENABLED or not Config.PROBE_URLS:
+            return
+        self.latency_probe = LatencyProbe(Config.PROBE_URLS, Config.PROBE_INTERVAL, Config.PROBE_TIMEOUT)
+        self.latency_probe.start()
+        self.logger.info(f"Latency probe started for: {', '.join(Config.PROBE_URLS)}")
+
+    @contextmanager
+    def probe_step(self, step):
+        """Tag probe samples before, during and after a rotation step"""
+        if not self.latency_probe:
+            yield
+            return
+
+        print(f"⏱️ Sampling site latency for {Config.PROBE_WINDOW}s before: {step}")
+        self.latency_probe.set_phase(step, "before")
+        time.sleep(Config.PROBE_WINDOW)
+        self.latency_probe.set_phase(step, "during")
+        try:
+            yield
+        finally:
+            print(f"⏱️ Sampling site latency for {Config.PROBE_WINDOW}s after: {step}")
+            self.latency_probe.set_phase(step, "after")
+            time.sleep(Config.PROBE_WINDOW)
+            self.latency_probe.set_phase(None, "idle")
+
+    def save_probe_report(self):
+        """Stop the latency probe, log its summary and save it to a report file"""
+        if not self.latency_probe:
+            return
+
+        self.latency_probe.stop()
+        stats = self.latency_probe.summary()
+        lines = self.latency_probe.summary_lines(stats)
+        self.latency_probe = None
+        if not stats:
+            return
+
+        print("\n" + "="*70)
+        print("SITE LATENCY DURING ROTATION")
+        print("="*70)
+        self.logger.info("Site latency summary (before/during/after each step):")
+        for line in lines:
+            self.logger.info(line)
+
+        report_file = f"/tmp/password_update_latency_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        report = {
+            "generated": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "log_file": self.log_file,
+            "urls": Config.PROBE_URLS,
+            "interval_seconds": Config.PROBE_INTERVAL,
+            "window_seconds": Config.PROBE_WINDOW,
+            "summary": stats,
+        }
+        try:
+            with open(report_file, 'w') as f:
+                json.dump(report, f, indent=2)
+            self.probe_report_file = report_file
+            print(f"Latency report saved to: {report_file}")
+        except Exception as e:
+            print(f"Error saving latency report: {e}")
+
     def show_menu(self):
         """Main menu system"""
         while True:
@@ -661,7 +1138,9 @@ System Administrator
             elif choice == "5":
                 self.show_configuration()
             elif choice == "6":
+                self.save_probe_report()
                 self.save_email_draft()
+                self.dispatch_email_drafts()
                 print("Exiting...")
                 break
             else:
@@ -676,25 +1155,15 @@ System Administrator
             print(f"Log file: {self.log_file}")
             print()
             
-            # Auto-detect Magento
-            if not self.detect_magento_root():
-                print("Failed to locate Magento installation")
-                return
-            
-            print()
-            print(f"Using Magento: {self.magento_root}")
-            print()
-            
-            # Validate configuration
-            if not self.validate_configuration():
-                print("System validation failed. Please check the errors above.")
-                return
+            # Sample site latency across rotation steps (optional)
+            self.start_latency_probe()
             
             # Show menu
             self.show_menu()
             
         except KeyboardInterrupt:
             print("\nScript interrupted by user")
+            self.save_probe_report()
             self.save_email_draft()
         except Exception as e:
             print(f"Unexpected error: {e}")